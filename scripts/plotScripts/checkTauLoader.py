@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+import os
+import shutil
+import sys
+import tempfile
+import numpy as np
+
+from tauLoader import loadCalculation
+
+# checks that tauLoader reads the relaxation times files of the examples,
+# both the (iCalc, iEnergy) layout of EPA and the (iCalc, ik, ib) layout of
+# the lifetimes apps, with and without the .npz cache
+
+if __name__ == "__main__":
+
+    exampleDir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "..", "..", "example")
+    listOfJsons = [
+        [os.path.join("Silicon-epa", "reference", "epa_relaxation_times.json"), 1],
+        [os.path.join("Silicon-el", "reference", "path_el_relaxation_times.json"), 2],
+        [os.path.join("Silicon-ph", "reference", "path_ph_relaxation_times.json"), 2],
+    ]
+    keys = ['relaxationTimes', 'energies', 'linewidths']
+
+    tmpDir = tempfile.mkdtemp()
+    try:
+        for filename, ndim in listOfJsons:
+            # work on a copy, so that the cache isn't written in the repository
+            jfileName = os.path.join(tmpDir, os.path.basename(filename))
+            shutil.copy(os.path.join(exampleDir, filename), jfileName)
+
+            freshData, freshArrays = loadCalculation(jfileName, 0, keys)
+            cachedData, cachedArrays = loadCalculation(jfileName, 0, keys)
+
+            print(filename)
+            for arrays in [freshArrays, cachedArrays]:
+                for key, x in zip(keys, arrays):
+                    if x.ndim != ndim or x.dtype != np.float32:
+                        print(key, x.shape, x.dtype)
+                        print(filename)
+                        sys.exit(1)
+            for key, x1, x2 in zip(keys, freshArrays, cachedArrays):
+                if not np.array_equal(x1, x2):
+                    print(key)
+                    print(filename)
+                    sys.exit(1)
+            if freshData != cachedData:
+                print(freshData, cachedData, sep="\n")
+                print(filename)
+                sys.exit(1)
+
+            # a script reading other arrays must not drop those already cached
+            os.remove(jfileName + ".cal0.npz")
+            loadCalculation(jfileName, 0, keys[:1])
+            loadCalculation(jfileName, 0, keys[1:])
+            with np.load(jfileName + ".cal0.npz") as cache:
+                if not set(keys) <= set(cache.files):
+                    print(cache.files)
+                    print(filename)
+                    sys.exit(1)
+    finally:
+        shutil.rmtree(tmpDir)
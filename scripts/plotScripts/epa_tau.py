@@ -1,11 +1,10 @@
 #!/usr/bin/env python3
-import json
 import matplotlib.pyplot as plt
 import numpy as np
 import argparse
-import itertools
 import os
-import sys
+
+from tauLoader import loadCalculation
 
 # script to plot the EPA relaxation times found in epa_relaxation_times.json
 
@@ -28,62 +27,69 @@ if __name__ == "__main__":
 
     # load in the json output
     jfileName = args.INPUT
-    with open(jfileName) as jfile:
-        data = json.load(jfile)
-
-    try:
-        data['relaxationTimes']
-    except KeyError:
-        raise KeyError("relaxation times not found."
-              "Are you using the correct input json file?")
+    # unpack the json file, only for the selected calculation
+    # these arrays are only plotted, so single precision is enough
+    # tau, energies and linewidths have dimensions (iEnergy) for EPA files,
+    # or (ik, ib) for relaxation times files from the other apps
+    data, (tau, energies, linewidths) = loadCalculation(jfileName, calcIndex,
+                        ['relaxationTimes', 'energies', 'linewidths'])
 
     particleType = data['particleType']
 
-    # unpack the json file
-    tau = np.array(data['relaxationTimes'])    # dimensions (iCalc, ik, ib)
-    tau[np.where(tau==None)] = 0   # remove None values (from gamma pt acoustic ph)
-    energies = np.array(data['energies'])      # dimensions (iCalc, ik, ib)
-    linewidths = np.array(data['linewidths'])      # dimensions (iCalc, ik, ib)
     mu = np.array(data['chemicalPotentials'])
     T = np.array(data['temperatures'])
 
-    linewidths = linewidths[calcIndex].flatten()
-    energies = energies[calcIndex].flatten()
-    tau = tau[calcIndex].flatten()
+    linewidths = linewidths.ravel()
+    energies = energies.ravel()
+    tau = tau.ravel()
     mu = mu[calcIndex]
-    energies = energies - mu
+    energies -= mu
 
     print("Calculation Temperature: ", T[calcIndex])
 
-    for y, name in [[tau,'tau'], [linewidths,'Gamma']]:
+    # phonon plots start at zero energy: drop the points that would be
+    # clipped away anyway, so that they aren't drawn at all
+    if (particleType=="phonon"):
+        visible = energies >= 0.
+        if not visible.any():
+            raise ValueError("No phonon states found at non-negative energies. "
+                             "Are you using the correct input json file?")
+        energies = energies[visible]
+        tau = tau[visible]
+        linewidths = linewidths[visible]
+
+    # the labels and output names are the same for both plots, up to the
+    # quantity on the y axis, so we build them only once
+    energyLabel = r'Energy [' + data['energyUnit'] +']'
+    plotFileRoot = os.path.splitext(jfileName)[0]
+
+    for y, name, unit in [[tau,'tau',data['relaxationTimeUnit']],
+                          [linewidths,'Gamma',data['linewidthsUnit']]]:
 
         # plot the lifetimes
         plt.figure(figsize=(5,5))
 
-        plt.scatter(energies, y, marker='o', s=18, color='royalblue')
+        # a single-colored plot() is drawn much faster than scatter()
+        plt.plot(energies, y, marker='o', markersize=4.2, linestyle='none',
+                 markeredgewidth=0, color='royalblue', rasterized=True)
 
         # plot aesthetics
         plt.yscale('log')
-        plt.xlabel(r'Energy [' + data['energyUnit'] +']',fontsize=12)
-        if name == 'tau':
-            units = ' [' + data['relaxationTimeUnit'] + ']'
-        else:
-            units = ' [' + data['linewidthsUnit'] + ']'
-
-        plt.ylabel(r'$\{}_{{'.format(name) + data['particleType'] + '}$' +
-                   units, fontsize=12)
+        plt.xlabel(energyLabel,fontsize=12)
+        plt.ylabel(r'$\{}_{{'.format(name) + particleType + '}$' +
+                   ' [' + unit + ']', fontsize=12)
 
         if (particleType=="phonon"):
             plt.xlim(0,None)
 
         # Find limits of the y axis
-        zeroIndex = np.argwhere(y<=0.)
-        y = np.delete(y, zeroIndex)
-        ymin = 10**np.floor(np.log10(np.min(y)))
-        ymax = 10**np.ceil(np.log10(np.max(y)))
+        # (the log is taken only on positive values, the others are left NaN)
+        logY = np.log10(y, where=y>0., out=np.full_like(y, np.nan))
+        ymin = 10**np.floor(np.nanmin(logY))
+        ymax = 10**np.ceil(np.nanmax(logY))
         plt.ylim(ymin, ymax)
 
         plt.tight_layout()
-        plt.ylim(0.1, 1000)
-        plotFileName = os.path.splitext(jfileName)[0] + ".{}.png".format(name.lower())
+        plotFileName = plotFileRoot + ".{}.png".format(name.lower())
         plt.savefig(plotFileName,dpi=150)
+        plt.close()
@@ -0,0 +1,94 @@
+import json
+import itertools
+import os
+import numpy as np
+
+# helper functions to read the relaxation times json files,
+# shared by the plotting scripts in this folder
+
+# orjson parses number-heavy json files considerably faster than the
+# standard library, so we use it when it is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# the small entries of the json file used by the plotting scripts,
+# which are stored in the cache together with the arrays
+metadataKeys = ['particleType', 'chemicalPotentials', 'temperatures',
+                'energyUnit', 'linewidthsUnit', 'relaxationTimeUnit']
+
+def loadJSON(fileName):
+    if orjson is not None:
+        with open(fileName, 'rb') as jfile:
+            return orjson.loads(jfile.read())
+    with open(fileName) as jfile:
+        return json.load(jfile)
+
+#--------------------------------
+
+def loadCalculation(jfileName, calcIndex, keys):
+    # returns the metadata of the json file, and the arrays listed in keys
+    # for the selected calculation only, in single precision. The arrays are
+    # stored in the json file with dimensions (iCalc, ik, ib), or
+    # (iCalc, iEnergy) for EPA, and are returned as (ik, ib) or (iEnergy).
+    # The arrays are cached in a .npz file next to the json file, so that
+    # plotting the same calculation again skips parsing the json file
+    cacheName = jfileName + ".cal{}.npz".format(calcIndex)
+    cachedArrays = {}
+    if os.path.exists(cacheName) and \
+       os.path.getmtime(cacheName) >= os.path.getmtime(jfileName):
+        with np.load(cacheName) as cache:
+            cachedArrays = {key: cache[key] for key in cache.files
+                            if key not in metadataKeys}
+            # the cache may have been written by a script needing other arrays
+            if set(keys) <= set(cachedArrays):
+                # metadata is stored as numpy arrays: convert it back to the
+                # lists and strings found in the json file
+                data = {key: cache[key].tolist() for key in metadataKeys
+                        if key in cache.files}
+                return data, [cachedArrays[key] for key in keys]
+
+    data = loadJSON(jfileName)
+    for key in keys:
+        if key not in data:
+            raise KeyError("{} not found. ".format(key) +
+                           "Are you using the correct input json file?")
+
+    # None values (e.g. acoustic phonon modes at Gamma) are converted to NaN
+    # when the arrays are built, and then replaced with 0
+    # the data is rectangular, so the shape is known from the first row and
+    # the values are streamed straight into the output buffer, without
+    # letting numpy infer the shape from the nested lists
+    arrays = []
+    for key in keys:
+        rows = data[key][calcIndex]
+        if len(rows) == 0:
+            raise ValueError("{} is empty. ".format(key) +
+                             "Are you using the correct input json file?")
+        if isinstance(rows[0], list):
+            # (ik, ib) data, e.g. from the lifetimes and transport apps
+            if any(not isinstance(row, list) or len(row) != len(rows[0])
+                   for row in rows):
+                raise ValueError("{} is not rectangular. ".format(key) +
+                                 "Are you using the correct input json file?")
+            shape = (len(rows), len(rows[0]))
+            values = itertools.chain.from_iterable(rows)
+        else:
+            # (iEnergy) data, e.g. from the EPA transport app
+            shape = (len(rows),)
+            values = rows
+        x = np.fromiter(values, dtype=np.float32,
+                        count=int(np.prod(shape))).reshape(shape)
+        x[np.isnan(x)] = 0.
+        arrays.append(x)
+
+    # keep the arrays already cached by other scripts, so that running
+    # different scripts on the same file doesn't parse it every time
+    data = {key: data[key] for key in metadataKeys if key in data}
+    cachedArrays.update(zip(keys, arrays))
+    try:
+        np.savez(cacheName, **data, **cachedArrays)
+    except OSError:
+        pass   # e.g. the json file is in a read-only directory
+    return data, arrays
@@ -1,60 +1,78 @@
 #!/usr/bin/env python3
-import json
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.lines import Line2D
 import numpy as np
 import argparse
 import os
 
-def punchPlotTau(plotFileName, tau, points, pathTicks, pathLabels):
-    nbands = len(tau[0,:])
+from tauLoader import loadJSON, loadCalculation
+
+def pathSegments(points, y):
+    # converts values y of dimensions (ik, ib) along the path into line
+    # segments of dimensions (ib, ik, 2), with the x coordinates written
+    # once for all bands directly into the contiguous output buffer
+    segments = np.empty((y.shape[1], y.shape[0], 2), dtype=y.dtype)
+    segments[:,:,0] = points
+    segments[:,:,1] = y.T
+    return segments
+
+#--------------------------------
+
+def punchPlotTau(plotFileName, tau, points, pathTicks, pathLabels,
+                 particleType, tauUnit):
+    nk, nbands = tau.shape
+    colors = plt.get_cmap('winter')(np.linspace(0,1,nbands))
+
+    # zeros (e.g. acoustic phonons at Gamma) can't be drawn on a log scale:
+    # replace them, band by band, with the closest previous point on the path,
+    # or with the first nonzero point if they are at the start of the path
+    nonZero = tau != 0.
+    kIndices = np.arange(nk)[:,None]
+    fillIndex = np.where(nonZero, kIndices, 0)
+    np.maximum.accumulate(fillIndex, axis=0, out=fillIndex)
+    firstNonZero = nonZero.argmax(axis=0)
+    fillIndex = np.where(kIndices < firstNonZero, firstNonZero, fillIndex)
+    tau = np.take_along_axis(tau, fillIndex, axis=0)
 
     # plot the lifetimes, colored by band, for all dimensions
+    # all bands are drawn as a single collection of lines, with shape
+    # (nbands, nk, 2), rather than as one artist per band, and rasterized
+    # so that the pdf doesn't store every segment as a vector object
     plt.figure(figsize=(6,4.2))
-    colors = plt.get_cmap('winter')(np.linspace(0,1,nbands))
-    for ib in range(nbands):
-        y = tau[:,ib]
-        x = points
-
-        indexes = np.where(y==0.)
-        for index in indexes:
-            try:
-                y[index] = y[index-1]
-            except IndexError:
-                try:
-                    y[index] = y[index+1]
-                except IndexError:
-                    raise IndexError("Not enough points in path?")
-
-        plt.plot(x, y, label="band #{}".format(ib+1))
+    ax = plt.gca()
+    ax.add_collection(LineCollection(pathSegments(points, tau), colors=colors,
+                                     rasterized=True))
 
     # plot aesthetics
     plt.yscale('log')
-    plt.ylabel(r'$\tau_{' + data['particleType'] + '}$ [' +
-               data['relaxationTimeUnit'] + ']',fontsize=12)
+    plt.ylabel(r'$\tau_{' + particleType + '}$ [' + tauUnit + ']',fontsize=12)
     plt.xlim(points[0],points[-1])
-    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    bandLines = [Line2D([], [], color=color) for color in colors]
+    bandLabels = ["band #{}".format(ib+1) for ib in range(nbands)]
+    plt.legend(bandLines, bandLabels, bbox_to_anchor=(1.05, 1), loc='upper left')
 
     # Find limits of the y axis
-    flattenedTau = tau.flatten()
-    zeroIndex = np.argwhere(flattenedTau==0.)
-    flattenedTau = np.delete(flattenedTau, zeroIndex)
-    ymin = 10**np.floor(np.log10(np.min(flattenedTau)))
-    ymax = 10**np.ceil(np.log10(np.max(flattenedTau)))
+    # (the log is taken only on positive values, the others are left NaN)
+    logTau = np.log10(tau, where=tau>0., out=np.full_like(tau, np.nan))
+    ymin = 10**np.floor(np.nanmin(logTau))
+    ymax = 10**np.ceil(np.nanmax(logTau))
     plt.ylim(ymin, ymax)
 
     plt.xticks(pathTicks,pathLabels,fontsize=12)
     for i in pathTicks:
         plt.axvline(i, color='grey')
 
-    plt.savefig(plotFileName,bbox_inches='tight')
+    plt.savefig(plotFileName,bbox_inches='tight',dpi=150)
     plt.show(block=False)
 
 #--------------------------------
 
 def punchPlotBandTau(plotFileName2, energy, linewidth,
-                     points, pathTicks, pathLabels, mu=None):
+                     points, pathTicks, pathLabels,
+                     particleType, energyUnit, mu=None):
 
-    if data['particleType']=="phonon":
+    if particleType=="phonon":
         magFactor=10
     else:
         magFactor = 5.
@@ -78,18 +96,25 @@ def punchPlotBandTau(plotFileName2, energy, linewidth,
     else:
         energyLabel += r' $\pm$ {}$\cdot$linewith'.format(magFactor)
 
-    energyLabel += ' [' + data2['energyUnit'] +']'
-
-    # plot the bands
-    numBands = len(energies[0,:])
-    for i in range(numBands):
-        plt.plot(points, energies[:,i], 'k-', color='royalblue')
-
-        error = linewidth[:,i]
-        plt.fill_between(points,
-                         energies[:,i] - error*magFactor,
-                         energies[:,i] + error*magFactor,
-                         color="#62e4e5",alpha=0.5)
+    energyLabel += ' [' + energyUnit +']'
+
+    # plot the bands, as a single collection of lines
+    ax = plt.gca()
+    numBands = len(energy[0,:])
+    ax.add_collection(LineCollection(pathSegments(points, energy),
+                                     colors='royalblue', rasterized=True))
+
+    # shade energy +/- linewidth around each band, with all the bands
+    # filled by a single collection of polygons
+    lower = energy - linewidth*magFactor
+    upper = energy + linewidth*magFactor
+    verts = [np.concatenate([np.stack([points, lower[:,i]], axis=1),
+                             np.stack([points[::-1], upper[::-1,i]], axis=1)])
+             for i in range(numBands)]
+    ax.add_collection(PolyCollection(verts, facecolor="#62e4e5",
+                                     edgecolor="#62e4e5", alpha=0.5, zorder=1,
+                                     rasterized=True))
+    ax.autoscale_view()
 
     # plot aesthetics
     plt.xticks(pathTicks,pathLabels,fontsize=12)
@@ -100,7 +125,7 @@ def punchPlotBandTau(plotFileName2, energy, linewidth,
 
     plt.axhline(0, color='grey', ls='-')
 
-    plt.savefig(plotFileName2,bbox_inches='tight')
+    plt.savefig(plotFileName2,bbox_inches='tight',dpi=150)
     plt.show(block=False)
 
 #--------------------------------
@@ -119,38 +144,25 @@ if __name__ == "__main__":
 
     # load in the json output
     jfileName = args.INPUT
-    with open(jfileName) as jfile:
-        data = json.load(jfile)
-
-        # some relaxation times may be None (e.g. acoustic phonon modes at Gamma)
-        # we replace that with 0, in order to be plotted
-        try:
-            data['relaxationTimes'] =[ [ [ 0. if x==None else x for x in y]
-                                         for y in z ]
-                                       for z in data['relaxationTimes'] ]
-        except KeyError:
-            raise KeyError("relaxation times not found."
-                           "Are you using the correct input json file?")
-
-    # unpack the json file
-    tau = np.array(data['relaxationTimes'])    # dimensions (iCalc, ik, ib)
-    lwidths = np.array(data['linewidths'])    # dimensions (iCalc, ik, ib)
-    mu = np.array(data['chemicalPotentials'])
-    T = np.array(data['temperatures'])
-
     # the index used to select the calculation
     # also corresponds to the index for the temperature
     # and chemical potential of that calculation as stored in those arrays.
     calcIndex = int(args.calcIndex)
-    tau = tau[calcIndex]
-    lwidths = lwidths[calcIndex]
+
+    # unpack the json file, only for the selected calculation
+    # these arrays are only plotted, so single precision is enough
+    # tau and lwidths have dimensions (ik, ib)
+    data, (tau, lwidths) = loadCalculation(jfileName, calcIndex,
+                                           ['relaxationTimes', 'linewidths'])
+    particleType = data['particleType']
+    mu = np.array(data['chemicalPotentials'])
+    T = np.array(data['temperatures'])
     mu = mu[calcIndex]
     print("Calculation Temperature: ", T[calcIndex], "Calculation Chemical Potential:", mu)
 
     # Load the bandstructure file with the kpoints
     jfileName2 = args.INPUT2
-    with open(jfileName2) as jfile:
-        data2 = json.load(jfile)
+    data2 = loadJSON(jfileName2)
     # unpack the json file
     try:
         pathLabels = data2['highSymLabels']
@@ -158,12 +170,14 @@ if __name__ == "__main__":
         raise KeyError("highSymLabels not found. "
                        "Are you using the correct input json file?")
     pathTicks = data2['highSymIndices']
-    points = np.array(data2['wavevectorIndices'])
-    energies = np.array(data2['energies'])
+    points = np.array(data2['wavevectorIndices'], dtype=np.float32)
+    energies = np.array(data2['energies'], dtype=np.float32)
 
     plotFileName = os.path.splitext(jfileName)[0] + ".tau.pdf"
-    punchPlotTau(plotFileName, tau, points, pathTicks, pathLabels)
+    punchPlotTau(plotFileName, tau, points, pathTicks, pathLabels,
+                 particleType, data['relaxationTimeUnit'])
 
     plotFileName2 = os.path.splitext(jfileName2)[0] + ".tau.pdf"
     punchPlotBandTau(plotFileName2, energies, lwidths,
-                     points, pathTicks, pathLabels, mu)
+                     points, pathTicks, pathLabels,
+                     particleType, data2['energyUnit'], mu)